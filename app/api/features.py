@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from ..models.schemas import FeatureQueryRequest, FeatureQueryResponse
+from ..services.feature_store import FeatureStore
+
+router = APIRouter(prefix="/api/features", tags=["features"])
+
+
+def get_feature_store() -> FeatureStore:
+    """Dependency to get feature store"""
+    from ..main import feature_store
+    return feature_store
+
+
+@router.post("/query", response_model=FeatureQueryResponse)
+async def query_features(
+    request: FeatureQueryRequest,
+    feature_store: FeatureStore = Depends(get_feature_store)
+):
+    """Find jobs where at least min_fraction of frames satisfy every predicate"""
+    try:
+        # Column scans read from disk, keep them off the event loop
+        result = await run_in_threadpool(
+            feature_store.query,
+            [p.model_dump() for p in request.where],
+            request.min_fraction,
+            request.min_frames,
+            request.since,
+            request.until,
+            request.model_name,
+            request.limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FeatureQueryResponse(**result)
+
+
+@router.get("/{job_id}")
+async def get_feature_summary(job_id: str, feature_store: FeatureStore = Depends(get_feature_store)):
+    """Per-column summary statistics for a job"""
+    summary = feature_store.get_summary(job_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No features for job")
+    return summary
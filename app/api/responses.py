@@ -0,0 +1,142 @@
+import gzip
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Hashable
+
+import numpy as np
+import orjson
+import zstandard
+from fastapi import Request
+from fastapi.responses import Response
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Bodies smaller than this are not worth the compression overhead
+MIN_COMPRESS_SIZE = 1024
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3)
+_zstd_lock = threading.Lock()
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize to JSON bytes, with numpy arrays and scalars handled natively"""
+    return orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+
+
+def project(payload: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+    """Keep only the requested comma-separated dotted fields.
+
+    A field is looked up on the payload first and then inside ``result``,
+    so ``fields=safety_assessment`` selects ``result.safety_assessment``.
+    ``job_id`` and ``status`` are always kept.
+    """
+    if not fields:
+        return payload
+    projected: Dict[str, Any] = {key: payload[key] for key in ("job_id", "status") if key in payload}
+    for field in filter(None, (f.strip() for f in fields.split(","))):
+        path = field.split(".")
+        source, target = payload, projected
+        if path[0] not in payload and isinstance(payload.get("result"), dict):
+            source = payload["result"]
+            target = projected.setdefault("result", {})
+        for key in path[:-1]:
+            source = source.get(key) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and path[-1] in source:
+                target[path[-1]] = source[path[-1]]
+    return projected
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick zstd or gzip from an Accept-Encoding header, preferring zstd"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ("zstd", "gzip"):
+        if accepted.get(encoding, 0.0) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "zstd":
+        with _zstd_lock:
+            return _zstd_compressor.compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+class SerializedCache:
+    """Small LRU of ready-to-send response bodies for immutable payloads"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def invalidate(self, job_id: str):
+        """Drop every entry cached for a job, keys being tuples that start with the job id"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == job_id]:
+                del self._entries[key]
+
+    def put(self, key: Hashable, entry: tuple):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def request_encoding(request: Request) -> Optional[str]:
+    return choose_encoding(request.headers.get("accept-encoding", ""))
+
+
+def encode_body(payload: Any, encoding: Optional[str], fields: Optional[str] = None) -> tuple:
+    """Project, serialize and compress a payload, returning (body, content_encoding)"""
+    body = dumps(project(payload, fields))
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    return compress(body, encoding), encoding
+
+
+def json_response(body: bytes, encoding: Optional[str]) -> Response:
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+
+from ..models.schemas import StorageMetricsResponse, StorageGCResponse
+from ..services.storage_manager import StorageManager
+
+router = APIRouter(prefix="/api/storage", tags=["storage"])
+
+
+def get_storage_manager() -> StorageManager:
+    """Dependency to get storage manager"""
+    from ..main import storage_manager
+    return storage_manager
+
+
+@router.get("/metrics", response_model=StorageMetricsResponse)
+async def storage_metrics(storage_manager: StorageManager = Depends(get_storage_manager)):
+    """Disk usage and reclaim statistics for uploaded videos"""
+    return StorageMetricsResponse(**storage_manager.get_metrics())
+
+
+@router.post("/gc", response_model=StorageGCResponse)
+async def run_gc(storage_manager: StorageManager = Depends(get_storage_manager)):
+    """Trigger a storage GC pass immediately"""
+    return StorageGCResponse(**await storage_manager.collect())
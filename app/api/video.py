@@ -1,9 +1,28 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+import json
+import asyncio
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Header, Query
 from fastapi import Depends
-from typing import List
+from fastapi.responses import FileResponse, Response, PlainTextResponse
+from typing import List, Optional, Literal
 
-from ..models.schemas import UploadResponse, StatusResponse, ResultResponse
+from config import config
+
+from ..models.schemas import (
+    JobStatus,
+    UploadResponse,
+    StatusResponse,
+    ResultResponse,
+    ChunkedUploadInitRequest,
+    ChunkedUploadStatusResponse,
+    ChunkedUploadCompleteRequest,
+)
 from ..services.video_analysis import VideoAnalysisService
+from ..services.chunked_upload import ChunkedUploadService
+from ..services.file_storage import FileStorageService
+from ..services.storage_manager import StorageManager, QuotaExceededError
+from ..services.profiling import PROFILE_DIR_NAME, STAGES_FILE, PSTATS_FILE, pstats_text
+from .storage import get_storage_manager
+from .responses import SerializedCache, request_encoding, encode_body, json_response, project
 
 router = APIRouter(prefix="/api/video", tags=["video"])
 
@@ -14,11 +33,31 @@ def get_analysis_service() -> VideoAnalysisService:
     return analysis_service
 
 
+def get_storage_service() -> FileStorageService:
+    """Dependency to get file storage service"""
+    from ..main import storage_service
+    return storage_service
+
+
+def get_result_cache() -> SerializedCache:
+    """Dependency to get the serialized result cache"""
+    from ..main import result_cache
+    return result_cache
+
+
+def get_chunked_upload_service() -> ChunkedUploadService:
+    """Dependency to get chunked upload service"""
+    from ..main import chunked_upload_service
+    return chunked_upload_service
+
+
 @router.post("/upload", response_model=UploadResponse)
 async def upload_video(
     file: UploadFile = File(...),
     model_name: str = Form(...),
-    analysis_service: VideoAnalysisService = Depends(get_analysis_service)
+    profile: bool = Form(False),
+    analysis_service: VideoAnalysisService = Depends(get_analysis_service),
+    storage_manager: StorageManager = Depends(get_storage_manager)
 ):
     """Upload video for analysis"""
     if analysis_service is None:
@@ -36,15 +75,117 @@ async def upload_video(
             detail=f"Unknown model: {model_name}. Available models: {available_models}"
         )
     
+    if file.size is not None and not storage_manager.has_capacity(file.size):
+        raise HTTPException(status_code=507, detail="Storage quota exceeded")
+    
     try:
         job_id = await analysis_service.submit_job(
-            file.file, model_name, file.filename
+            file, model_name, file.filename, profile=profile
         )
         return UploadResponse(job_id=job_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+@router.post("/uploads", response_model=ChunkedUploadStatusResponse)
+async def initiate_chunked_upload(
+    request: ChunkedUploadInitRequest,
+    analysis_service: VideoAnalysisService = Depends(get_analysis_service),
+    upload_service: ChunkedUploadService = Depends(get_chunked_upload_service)
+):
+    """Start a resumable chunked upload; the returned upload_id becomes the job_id"""
+    available_models = analysis_service.list_models()
+    if request.model_name not in available_models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown model: {request.model_name}. Available models: {available_models}"
+        )
+    
+    try:
+        status_info = upload_service.initiate(
+            request.filename, request.model_name, request.total_size, request.chunk_size,
+            profile=request.profile
+        )
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=507, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ChunkedUploadStatusResponse(**status_info)
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}", response_model=ChunkedUploadStatusResponse)
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None),
+    upload_service: ChunkedUploadService = Depends(get_chunked_upload_service)
+):
+    """Upload one chunk; chunks may be sent in parallel and in any order"""
+    # Check the declared size before buffering the body
+    try:
+        expected = upload_service.expected_chunk_length(upload_id, index)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if expected is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    content_length = request.headers.get("content-length")
+    if content_length is None:
+        raise HTTPException(status_code=411, detail="Content-Length required")
+    if content_length != str(expected):
+        raise HTTPException(
+            status_code=400, detail=f"Chunk {index} must be {expected} bytes, got {content_length}"
+        )
+    
+    data = await request.body()
+    try:
+        status_info = await upload_service.write_chunk(upload_id, index, data, x_chunk_sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if status_info is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return ChunkedUploadStatusResponse(**status_info)
+
+
+@router.get("/uploads/{upload_id}", response_model=ChunkedUploadStatusResponse)
+async def get_chunked_upload_status(
+    upload_id: str,
+    upload_service: ChunkedUploadService = Depends(get_chunked_upload_service)
+):
+    """List the chunks received so far, used to resume an interrupted upload"""
+    status_info = upload_service.get_status(upload_id)
+    if status_info is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return ChunkedUploadStatusResponse(**status_info)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=UploadResponse)
+async def complete_chunked_upload(
+    upload_id: str,
+    request: ChunkedUploadCompleteRequest,
+    upload_service: ChunkedUploadService = Depends(get_chunked_upload_service)
+):
+    """Verify the assembled file and start the analysis job"""
+    try:
+        job_id = await upload_service.finalize(upload_id, request.sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if job_id is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return UploadResponse(job_id=job_id)
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_chunked_upload(
+    upload_id: str,
+    upload_service: ChunkedUploadService = Depends(get_chunked_upload_service)
+):
+    """Abort an upload and discard the received chunks"""
+    if not upload_service.abort(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"upload_id": upload_id, "aborted": True}
+
+
 @router.get("/{job_id}/status", response_model=StatusResponse)
 async def get_job_status(job_id: str, analysis_service: VideoAnalysisService = Depends(get_analysis_service)):
     """Get job status"""
@@ -59,16 +200,102 @@ async def get_job_status(job_id: str, analysis_service: VideoAnalysisService = D
 
 
 @router.get("/{job_id}/result", response_model=ResultResponse)
-async def get_job_result(job_id: str, analysis_service: VideoAnalysisService = Depends(get_analysis_service)):
+async def get_job_result(
+    job_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. safety_assessment"),
+    analysis_service: VideoAnalysisService = Depends(get_analysis_service),
+    result_cache: SerializedCache = Depends(get_result_cache)
+):
     """Get job result"""
     if analysis_service is None:
         analysis_service = get_analysis_service()
     
+    encoding = request_encoding(request)
+    cache_key = (job_id, fields, encoding)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return json_response(*cached)
+    
     result_info = analysis_service.get_job_result(job_id)
     if result_info is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return ResultResponse(**result_info)
+    # Built by the service, so skip model validation and serialize directly
+    body = encode_body(result_info, encoding, fields)
+    if result_info["status"] in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+        # Finished results never change, keep the encoded bytes
+        result_cache.put(cache_key, body)
+    return json_response(*body)
+
+
+@router.get("/{job_id}/video")
+async def stream_video(
+    job_id: str,
+    storage_service: FileStorageService = Depends(get_storage_service),
+    storage_manager: StorageManager = Depends(get_storage_manager)
+):
+    """Serve the uploaded video with HTTP Range support so the player can seek"""
+    try:
+        file_path = storage_service.get_file_path(job_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Video not found")
+    storage_manager.touch(job_id)
+
+    if config.SENDFILE_ACCEL_PREFIX:
+        # Let the reverse proxy serve the file and its ranges with sendfile
+        relative = file_path.relative_to(storage_service.upload_dir).as_posix()
+        return Response(headers={
+            "X-Accel-Redirect": f"{config.SENDFILE_ACCEL_PREFIX.rstrip('/')}/{relative}"
+        })
+    return FileResponse(file_path)
+
+
+@router.get("/{job_id}/thumbnails/{name}")
+async def get_thumbnail(
+    job_id: str,
+    name: str,
+    storage_service: FileStorageService = Depends(get_storage_service)
+):
+    """Serve a keyframe thumbnail saved during analysis"""
+    try:
+        file_path = storage_service.get_thumbnail_path(job_id, name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    # Thumbnails never change once written
+    return FileResponse(file_path, headers={"Cache-Control": "public, max-age=604800, immutable"})
+
+
+@router.get("/{job_id}/profile")
+async def get_job_profile(
+    job_id: str,
+    fmt: Literal["json", "collapsed", "pstats", "text"] = Query("json", alias="format"),
+    storage_service: FileStorageService = Depends(get_storage_service)
+):
+    """Download the profile of a job submitted with profile=true
+
+    json: per-frame stage breakdown; collapsed: stacks for flamegraph.pl/speedscope;
+    pstats: raw cProfile dump; text: cumulative-time report.
+    """
+    profile_dir = storage_service.get_job_dir(job_id) / PROFILE_DIR_NAME
+    stages_path = profile_dir / STAGES_FILE
+    pstats_path = profile_dir / PSTATS_FILE
+    if not stages_path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    loop = asyncio.get_running_loop()
+    if fmt == "json":
+        return FileResponse(stages_path, media_type="application/json")
+    if fmt == "collapsed":
+        stages = await loop.run_in_executor(None, lambda: json.loads(stages_path.read_text()))
+        return PlainTextResponse(stages["collapsed"])
+    if not pstats_path.is_file():
+        raise HTTPException(status_code=404, detail="pstats dump not found")
+    if fmt == "pstats":
+        return FileResponse(
+            pstats_path, media_type="application/octet-stream", filename=f"{job_id}.pstats"
+        )
+    return PlainTextResponse(await loop.run_in_executor(None, pstats_text, pstats_path))
 
 
 @router.get("/models", response_model=List[str])
@@ -81,9 +308,16 @@ async def list_models(analysis_service: VideoAnalysisService = Depends(get_analy
 
 
 @router.get("/jobs")
-async def list_jobs(analysis_service: VideoAnalysisService = Depends(get_analysis_service)):
+async def list_jobs(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per job"),
+    analysis_service: VideoAnalysisService = Depends(get_analysis_service)
+):
     """List recent jobs"""
     if analysis_service is None:
         analysis_service = get_analysis_service()
-    return analysis_service.list_jobs()
+    jobs = analysis_service.list_jobs()
+    if fields:
+        jobs = [project(job, fields) for job in jobs]
+    return json_response(*encode_body(jobs, request_encoding(request)))
 
@@ -1,10 +1,18 @@
+from contextlib import asynccontextmanager
+from datetime import timedelta
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
 
-from .api import health, video
+from config import config
+from .api import health, video, storage, features
+from .api.responses import SerializedCache
+from .models.schemas import JobStatus
 from .services.file_storage import FileStorageService
+from .services.storage_manager import StorageManager, parse_size
+from .services.chunked_upload import ChunkedUploadService
+from .services.feature_store import FeatureStore
 from .services.model_runner import (
     ModelRegistry, 
     DummyModelRunner, 
@@ -14,23 +22,71 @@ from .services.model_runner import (
 from .services.video_analysis import VideoAnalysisService
 
 # Initialize services
-storage_service = FileStorageService()
+storage_service = FileStorageService(config.UPLOAD_DIR)
+storage_manager = StorageManager(
+    storage_service,
+    quota_bytes=parse_size(config.STORAGE_QUOTA),
+    retention={
+        JobStatus.SUCCEEDED: timedelta(hours=config.RETENTION_SUCCEEDED_HOURS),
+        JobStatus.FAILED: timedelta(hours=config.RETENTION_FAILED_HOURS),
+    },
+    gc_interval=config.STORAGE_GC_INTERVAL,
+)
+feature_store = FeatureStore(config.UPLOAD_DIR)
+storage_manager.add_expire_callback(feature_store.forget)
 model_registry = ModelRegistry()
 model_registry.register(DummyModelRunner())
 model_registry.register(OpenCVModelRunner())
-model_registry.register(RailwayDetectionModelRunner())
-analysis_service = VideoAnalysisService(storage_service, model_registry)
+model_registry.register(RailwayDetectionModelRunner(processes=config.ANALYSIS_PROCESSES))
+analysis_service = VideoAnalysisService(
+    storage_service, model_registry, storage_manager, feature_store
+)
+result_cache = SerializedCache()
+
+
+def _on_video_evicted(job_id: str):
+    analysis_service.mark_video_evicted(job_id)
+    result_cache.invalidate(job_id)
+
+
+def _on_job_expired(job_id: str):
+    analysis_service.mark_files_expired(job_id)
+    result_cache.invalidate(job_id)
+
+
+storage_manager.add_evict_callback(_on_video_evicted)
+storage_manager.add_expire_callback(_on_job_expired)
+chunked_upload_service = ChunkedUploadService(
+    storage_service,
+    analysis_service,
+    session_ttl=timedelta(hours=config.UPLOAD_SESSION_TTL_HOURS),
+    storage_manager=storage_manager,
+    max_size=parse_size(config.MAX_FILE_SIZE),
+)
+storage_manager.add_collect_callback(chunked_upload_service.expire_stale)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background storage GC runs for the lifetime of the app
+    storage_manager.start()
+    yield
+    await storage_manager.stop()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="视频分析校验系统",
     description="Video Analysis Validation Service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
 app.include_router(health.router)
 app.include_router(video.router)
+app.include_router(storage.router)
+app.include_router(features.router)
 
 # Mount static files
 if os.path.exists("static"):
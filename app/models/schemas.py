@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class JobStatus(str, Enum):
@@ -15,6 +15,30 @@ class UploadResponse(BaseModel):
     job_id: str
 
 
+class ChunkedUploadInitRequest(BaseModel):
+    filename: str
+    model_name: str
+    total_size: int
+    chunk_size: Optional[int] = None
+    profile: bool = False
+
+
+class ChunkedUploadStatusResponse(BaseModel):
+    upload_id: str
+    filename: str
+    model_name: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: List[int]
+    bytes_received: int
+    complete: bool
+
+
+class ChunkedUploadCompleteRequest(BaseModel):
+    sha256: str
+
+
 class StatusResponse(BaseModel):
     job_id: str
     status: JobStatus
@@ -27,8 +51,67 @@ class ResultResponse(BaseModel):
     result: Optional[Dict[str, Any]] = None
     message: Optional[str] = None
     completed_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    model_name: Optional[str] = None
+    original_filename: Optional[str] = None
+    profile: Optional[Dict[str, Any]] = None
+    video_stored: bool = False
+    thumbnails_stored: bool = False
 
 
 class HealthResponse(BaseModel):
     status: str
 
+
+
+class StorageMetricsResponse(BaseModel):
+    usage_bytes: int
+    quota_bytes: int
+    usage_ratio: float
+    video_bytes: int
+    files_stored: int
+    bytes_reclaimed_total: int
+    files_reclaimed_total: int
+    evictions_total: int
+    expirations_total: int
+    reclaim_rate_bytes_per_sec: float
+    gc_runs: int
+    last_gc_at: Optional[datetime] = None
+
+
+class StorageGCResponse(BaseModel):
+    files_deleted: int
+    bytes_reclaimed: int
+
+
+class FeaturePredicate(BaseModel):
+    column: str
+    op: str = ">"
+    value: float = 0
+
+
+class FeatureQueryRequest(BaseModel):
+    where: List[FeaturePredicate] = Field(default_factory=list)
+    min_fraction: float = 0.0
+    min_frames: int = 1
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    model_name: Optional[str] = None
+    limit: int = 100
+
+
+class FeatureQueryMatch(BaseModel):
+    job_id: str
+    model_name: Optional[str] = None
+    original_filename: Optional[str] = None
+    created_at: Optional[datetime] = None
+    frames: int
+    matched_frames: int
+    fraction: float
+
+
+class FeatureQueryResponse(BaseModel):
+    matches: List[FeatureQueryMatch]
+    jobs_considered: int
+    jobs_answered_from_index: int
+    jobs_scanned: int
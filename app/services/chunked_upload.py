@@ -0,0 +1,281 @@
+import os
+import math
+import uuid
+import shutil
+import asyncio
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from .file_storage import FileStorageService
+from .storage_manager import StorageManager, QuotaExceededError
+from .video_analysis import VideoAnalysisService
+
+PART_SUFFIX = ".part"
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _write_at(fd: int, data: bytes, offset: int, lock: threading.Lock):
+    """Write data at an absolute offset without moving a shared file position"""
+    if hasattr(os, "pwrite"):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+    else:
+        # Platforms without pwrite fall back to seek + write under the session lock
+        with lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+
+
+def _verified_write_at(fd: int, data: bytes, offset: int, lock: threading.Lock,
+                       sha256: Optional[str], index: int):
+    """Check a chunk against its digest, if one was sent, then write it at its offset"""
+    if sha256 is not None and hashlib.sha256(data).hexdigest() != sha256.lower():
+        raise ValueError(f"Checksum mismatch for chunk {index}")
+    _write_at(fd, data, offset, lock)
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChunkedUploadService:
+    """Resumable uploads assembled from numbered, independently sent chunks.
+
+    The upload id doubles as the job id: chunks are written straight into
+    the job's storage directory at ``index * chunk_size`` with positional
+    writes, so they may arrive in parallel and in any order, and finalizing
+    is just a checksum pass plus a rename.
+
+    Every blocking file operation of a session is counted while it runs on
+    the I/O pool; finalizing waits for the count to drain and aborting
+    defers closing the descriptor to the last operation still using it.
+    """
+
+    def __init__(
+        self,
+        storage_service: FileStorageService,
+        analysis_service: VideoAnalysisService,
+        session_ttl: timedelta = timedelta(hours=24),
+        storage_manager: Optional[StorageManager] = None,
+        max_size: Optional[int] = None,
+    ):
+        self.storage_service = storage_service
+        self.analysis_service = analysis_service
+        self.session_ttl = session_ttl
+        self.storage_manager = storage_manager
+        self.max_size = max_size
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chunk-io")
+        self._remove_orphaned_parts()
+
+    def _remove_orphaned_parts(self):
+        """Sessions live in memory only, so partial files from earlier runs can never finish"""
+        for job_dir in self.storage_service.upload_dir.iterdir():
+            if job_dir.is_dir() and any(job_dir.glob(f"video.*{PART_SUFFIX}")):
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def initiate(self, filename: str, model_name: str, total_size: int,
+                 chunk_size: Optional[int] = None, profile: bool = False) -> Dict[str, Any]:
+        """Create an upload session and pre-allocate its target file"""
+        self.expire_stale()
+
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        if total_size <= 0:
+            raise ValueError("total_size must be positive")
+        if self.max_size is not None and total_size > self.max_size:
+            raise ValueError(f"total_size exceeds the {self.max_size} byte limit")
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(
+                f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes"
+            )
+
+        if self.storage_manager is not None:
+            # Open sessions are not tracked yet but their files are already allocated
+            if not self.storage_manager.has_capacity(total_size + self.reserved_bytes()):
+                raise QuotaExceededError("Storage quota exceeded")
+
+        upload_id = str(uuid.uuid4())
+        final_path = self.storage_service.allocate_file_path(upload_id, filename)
+        part_path = final_path.with_name(final_path.name + PART_SUFFIX)
+
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        os.ftruncate(fd, total_size)
+
+        idle = asyncio.Event()
+        idle.set()
+        now = datetime.now()
+        self.sessions[upload_id] = {
+            "filename": filename,
+            "model_name": model_name,
+            "profile": profile,
+            "total_size": total_size,
+            "chunk_size": chunk_size,
+            "total_chunks": math.ceil(total_size / chunk_size),
+            "received": set(),
+            "final_path": final_path,
+            "part_path": part_path,
+            "fd": fd,
+            "lock": threading.Lock(),
+            "inflight": 0,
+            "idle": idle,
+            "finalizing": False,
+            "aborted": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        return self.get_status(upload_id)
+
+    def reserved_bytes(self) -> int:
+        """Bytes pre-allocated by sessions that have not been finalized yet"""
+        return sum(session["total_size"] for session in self.sessions.values())
+
+    async def _run_io(self, session: Dict[str, Any], func, *args):
+        """Run blocking file I/O for a session on the pool, keeping its fd open until it returns"""
+        session["inflight"] += 1
+        session["idle"].clear()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            session["inflight"] -= 1
+            if not session["inflight"]:
+                session["idle"].set()
+                if session["aborted"]:
+                    self._release(session)
+
+    def _release(self, session: Dict[str, Any]):
+        """Close the session's file, removing it as well if the upload was aborted"""
+        if session["fd"] is not None:
+            os.close(session["fd"])
+            session["fd"] = None
+        if session["aborted"]:
+            shutil.rmtree(session["final_path"].parent, ignore_errors=True)
+
+    def _expected_chunk_length(self, session: Dict[str, Any], index: int) -> int:
+        offset = index * session["chunk_size"]
+        return min(session["chunk_size"], session["total_size"] - offset)
+
+    def expected_chunk_length(self, upload_id: str, index: int) -> Optional[int]:
+        """Size in bytes chunk ``index`` must have, None if there is no such upload"""
+        session = self.sessions.get(upload_id)
+        if session is None:
+            return None
+        if not 0 <= index < session["total_chunks"]:
+            raise ValueError(f"Chunk index out of range: 0..{session['total_chunks'] - 1}")
+        return self._expected_chunk_length(session, index)
+
+    async def write_chunk(self, upload_id: str, index: int, data: bytes,
+                          sha256: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Write one chunk at its offset; re-sending a received chunk overwrites it"""
+        session = self.sessions.get(upload_id)
+        if session is None:
+            return None
+        if session["finalizing"]:
+            raise ValueError("Upload is already being finalized")
+        if not 0 <= index < session["total_chunks"]:
+            raise ValueError(f"Chunk index out of range: 0..{session['total_chunks'] - 1}")
+
+        expected = self._expected_chunk_length(session, index)
+        if len(data) != expected:
+            raise ValueError(f"Chunk {index} must be {expected} bytes, got {len(data)}")
+
+        await self._run_io(
+            session, _verified_write_at, session["fd"], data, index * session["chunk_size"],
+            session["lock"], sha256, index
+        )
+        if session["aborted"]:
+            return None
+        session["received"].add(index)
+        session["updated_at"] = datetime.now()
+        return self.get_status(upload_id)
+
+    def get_status(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Report which chunks have been received so far"""
+        session = self.sessions.get(upload_id)
+        if session is None:
+            return None
+        received = sorted(session["received"])
+        return {
+            "upload_id": upload_id,
+            "filename": session["filename"],
+            "model_name": session["model_name"],
+            "total_size": session["total_size"],
+            "chunk_size": session["chunk_size"],
+            "total_chunks": session["total_chunks"],
+            "received_chunks": received,
+            "bytes_received": sum(self._expected_chunk_length(session, i) for i in received),
+            "complete": len(received) == session["total_chunks"],
+        }
+
+    async def finalize(self, upload_id: str, sha256: str) -> Optional[str]:
+        """Verify the assembled file against its SHA-256 and start the analysis job.
+
+        Returns the job id, or None if the upload does not exist or was
+        aborted while it was being verified.
+        """
+        session = self.sessions.get(upload_id)
+        if session is None:
+            return None
+        if session["finalizing"]:
+            raise ValueError("Upload is already being finalized")
+        missing = session["total_chunks"] - len(session["received"])
+        if missing:
+            raise ValueError(f"Upload incomplete: {missing} chunks missing")
+
+        session["finalizing"] = True
+        try:
+            # Re-sent chunks still being written must land before the file is checked
+            await session["idle"].wait()
+            if session["aborted"]:
+                return None
+            await self._run_io(session, os.fsync, session["fd"])
+            if session["aborted"]:
+                return None
+            actual = await self._run_io(session, _sha256_file, session["part_path"])
+            if session["aborted"]:
+                return None
+            if actual != sha256.lower():
+                raise ValueError("Checksum mismatch for assembled file")
+        except Exception:
+            session["finalizing"] = False
+            raise
+
+        self._release(session)
+        os.replace(session["part_path"], session["final_path"])
+        self.sessions.pop(upload_id, None)
+
+        return self.analysis_service.submit_stored_job(
+            upload_id, session["final_path"], session["model_name"], session["filename"],
+            profile=session["profile"]
+        )
+
+    def abort(self, upload_id: str) -> bool:
+        """Discard an upload session and its partial file"""
+        session = self.sessions.pop(upload_id, None)
+        if session is None:
+            return False
+        session["aborted"] = True
+        if not session["inflight"]:
+            self._release(session)
+        return True
+
+    def expire_stale(self):
+        """Abort sessions that have not received a chunk within the session TTL"""
+        cutoff = datetime.now() - self.session_ttl
+        for upload_id, session in list(self.sessions.items()):
+            if session["updated_at"] < cutoff and not session["finalizing"]:
+                self.abort(upload_id)
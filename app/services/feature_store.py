@@ -0,0 +1,250 @@
+import json
+import logging
+import operator
+import threading
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+FEATURE_DIR_NAME = "features"
+SUMMARY_FILE = "summary.json"
+
+# Per-frame columns the runners may produce, with their on-disk dtype
+FEATURE_COLUMNS = {
+    "frame_number": np.int32,
+    "edge_density": np.float32,
+    "motion": np.float32,
+    "track_lines": np.int32,
+    "bright_objects": np.int32,
+    "dark_objects": np.int32,
+}
+
+PREDICATE_OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _local_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Job timestamps are naive local time, so convert aware datetimes before comparing"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def write_features(job_dir: Path, columns: Dict[str, list], fps: float = 0.0) -> Dict[str, Any]:
+    """Persist per-frame feature columns as .npy files plus a summary.json of per-column stats"""
+    feature_dir = job_dir / FEATURE_DIR_NAME
+    feature_dir.mkdir(exist_ok=True)
+
+    frames = len(columns.get("frame_number", []))
+    stats = {}
+    for name, values in columns.items():
+        array = np.asarray(values, dtype=FEATURE_COLUMNS[name])
+        np.save(feature_dir / f"{name}.npy", array)
+        if name == "frame_number":
+            continue
+        stats[name] = {
+            "min": float(array.min()) if frames else 0.0,
+            "max": float(array.max()) if frames else 0.0,
+            "mean": float(array.mean()) if frames else 0.0,
+            "nonzero": int(np.count_nonzero(array)),
+        }
+
+    summary = {"frames": frames, "fps": float(fps), "columns": stats}
+    (feature_dir / SUMMARY_FILE).write_text(json.dumps(summary))
+    return summary
+
+
+class FeatureStore:
+    """Index of per-job frame features with vectorized cross-job queries.
+
+    Each job keeps its feature columns as ``.npy`` files in its storage
+    directory; this store holds every job's summary statistics in memory so
+    that most predicates are decided from min/max/nonzero counts alone and
+    only ambiguous jobs have their columns memory-mapped and scanned.
+    """
+
+    def __init__(self, upload_dir: str = "uploads"):
+        self.upload_dir = Path(upload_dir)
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        """Recover summaries of jobs whose features are still on disk"""
+        for summary_path in self.upload_dir.glob(f"*/{FEATURE_DIR_NAME}/{SUMMARY_FILE}"):
+            try:
+                summary = json.loads(summary_path.read_text())
+            except (OSError, ValueError):
+                continue
+            if "created_at" in summary:
+                summary["created_at"] = datetime.fromisoformat(summary["created_at"])
+            self._index[summary_path.parent.parent.name] = summary
+
+    def _feature_dir(self, job_id: str) -> Path:
+        return self.upload_dir / job_id / FEATURE_DIR_NAME
+
+    def register(self, job_id: str, model_name: str, created_at: datetime,
+                 original_filename: Optional[str] = None) -> bool:
+        """Add a finished job's features to the index, returns False if the runner wrote none"""
+        summary_path = self._feature_dir(job_id) / SUMMARY_FILE
+        try:
+            summary = json.loads(summary_path.read_text())
+        except (OSError, ValueError):
+            return False
+        summary.update({
+            "model_name": model_name,
+            "created_at": created_at.isoformat(),
+            "original_filename": original_filename,
+        })
+        # Keep job metadata next to the columns so the index survives restarts
+        summary_path.write_text(json.dumps(summary))
+        summary["created_at"] = created_at
+        with self._lock:
+            self._index[job_id] = summary
+        return True
+
+    def forget(self, job_id: str):
+        with self._lock:
+            self._index.pop(job_id, None)
+
+    def get_summary(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            summary = self._index.get(job_id)
+        if summary is None:
+            return None
+        return {"job_id": job_id, **summary}
+
+    def load_columns(self, job_id: str, names: List[str]) -> Dict[str, np.ndarray]:
+        """Memory-map the requested feature columns of a job"""
+        feature_dir = self._feature_dir(job_id)
+        return {name: np.load(feature_dir / f"{name}.npy", mmap_mode="r") for name in names}
+
+    @staticmethod
+    def _decide_from_summary(stats: Dict[str, Any], op: str, value: float) -> Optional[str]:
+        """Classify a predicate as matching "all", "none" or undecided (None) frames"""
+        lo, hi = stats["min"], stats["max"]
+        if op == ">":
+            return "all" if lo > value else "none" if hi <= value else None
+        if op == ">=":
+            return "all" if lo >= value else "none" if hi < value else None
+        if op == "<":
+            return "all" if hi < value else "none" if lo >= value else None
+        if op == "<=":
+            return "all" if hi <= value else "none" if lo > value else None
+        if op == "==":
+            if lo == hi == value:
+                return "all"
+            return "none" if value < lo or value > hi else None
+        if op == "!=":
+            if lo == hi == value:
+                return "none"
+            return "all" if value < lo or value > hi else None
+        return None
+
+    def _count_from_summary(self, summary: Dict[str, Any], where: List[Dict[str, Any]]) -> Optional[int]:
+        """Matching frame count derived from the index alone, or None if the columns must be scanned"""
+        frames = summary["frames"]
+        undecided = []
+        for predicate in where:
+            stats = summary["columns"].get(predicate["column"])
+            if stats is None:
+                return 0
+            decision = self._decide_from_summary(stats, predicate["op"], predicate["value"])
+            if decision == "none":
+                return 0
+            if decision is None:
+                undecided.append((predicate, stats))
+        if not undecided:
+            return frames
+        if len(undecided) == 1:
+            # Features are non-negative, so "> 0" and "!= 0" are exactly the nonzero count
+            predicate, stats = undecided[0]
+            if predicate["value"] == 0 and predicate["op"] in (">", "!=") and stats["min"] >= 0:
+                return stats["nonzero"]
+        return None
+
+    def _scan(self, job_id: str, where: List[Dict[str, Any]]) -> int:
+        """Evaluate all predicates over a job's columns in one vectorized pass"""
+        columns = self.load_columns(job_id, sorted({p["column"] for p in where}))
+        mask = None
+        for predicate in where:
+            result = PREDICATE_OPS[predicate["op"]](columns[predicate["column"]], predicate["value"])
+            mask = result if mask is None else mask & result
+        return int(np.count_nonzero(mask)) if mask is not None else 0
+
+    def query(
+        self,
+        where: List[Dict[str, Any]],
+        min_fraction: float = 0.0,
+        min_frames: int = 1,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        model_name: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """Find jobs where enough frames satisfy every predicate"""
+        for predicate in where:
+            if predicate["column"] not in FEATURE_COLUMNS:
+                raise ValueError(f"Unknown feature column: {predicate['column']}")
+            if predicate["op"] not in PREDICATE_OPS:
+                raise ValueError(f"Unsupported operator: {predicate['op']}")
+        since, until = _local_naive(since), _local_naive(until)
+
+        with self._lock:
+            candidates = list(self._index.items())
+
+        matches = []
+        answered_from_index = 0
+        scanned = 0
+        for job_id, summary in candidates:
+            created_at = summary.get("created_at")
+            if since and (created_at is None or created_at < since):
+                continue
+            if until and (created_at is None or created_at > until):
+                continue
+            if model_name and summary.get("model_name") != model_name:
+                continue
+            frames = summary["frames"]
+            if not frames:
+                continue
+
+            matched = self._count_from_summary(summary, where)
+            if matched is None:
+                try:
+                    matched = self._scan(job_id, where)
+                except FileNotFoundError:
+                    # Job files were reclaimed underneath the index
+                    self.forget(job_id)
+                    continue
+                scanned += 1
+            else:
+                answered_from_index += 1
+
+            fraction = matched / frames
+            if matched >= min_frames and fraction >= min_fraction:
+                matches.append({
+                    "job_id": job_id,
+                    "model_name": summary.get("model_name"),
+                    "original_filename": summary.get("original_filename"),
+                    "created_at": created_at,
+                    "frames": frames,
+                    "matched_frames": matched,
+                    "fraction": fraction,
+                })
+
+        matches.sort(key=lambda m: m["fraction"], reverse=True)
+        return {
+            "matches": matches[:limit],
+            "jobs_considered": answered_from_index + scanned,
+            "jobs_answered_from_index": answered_from_index,
+            "jobs_scanned": scanned,
+        }
@@ -1,46 +1,125 @@
 import os
+import shutil
+import threading
 import aiofiles
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Dict, Optional
+
+THUMBNAIL_DIR_NAME = "thumbnails"
 
 
 class FileStorageService:
     def __init__(self, upload_dir: str = "uploads"):
         self.upload_dir = Path(upload_dir)
         self.upload_dir.mkdir(exist_ok=True)
-    
+        # job_id -> stored video path, so lookups never touch the filesystem
+        self._index: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Scan the upload directory once to recover files from earlier runs"""
+        for job_dir in self.upload_dir.iterdir():
+            if not job_dir.is_dir():
+                continue
+            for file_path in job_dir.glob("video.*"):
+                if file_path.suffix == ".part":
+                    continue  # unfinished chunked upload
+                self._index[job_dir.name] = file_path
+                break
+
     async def store_file(self, file: BinaryIO, job_id: str, original_filename: str) -> Path:
         """Store uploaded file and return the file path"""
+        file_path = self.allocate_file_path(job_id, original_filename)
+
+        # Write file asynchronously
+        async with aiofiles.open(file_path, 'wb') as f:
+            while chunk := await file.read(8192):  # Read in chunks
+                await f.write(chunk)
+
+        self.register_file(job_id, file_path)
+        return file_path
+
+    def allocate_file_path(self, job_id: str, original_filename: str) -> Path:
+        """Create the job directory and return the path the video should be written to"""
         # Create subdirectory for the job
         job_dir = self.upload_dir / job_id
         job_dir.mkdir(exist_ok=True)
-        
+
         # Determine file extension
-        file_extension = Path(original_filename).suffix
+        file_extension = Path(original_filename or "").suffix
         if not file_extension:
             file_extension = ".mp4"  # Default extension
-        
-        # Create file path
-        file_path = job_dir / f"video{file_extension}"
-        
-        # Write file asynchronously
-        async with aiofiles.open(file_path, 'wb') as f:
-            while chunk := await file.read(8192):  # Read in chunks
-                await f.write(chunk)
-        
-        return file_path
-    
+
+        return job_dir / f"video{file_extension}"
+
+    def register_file(self, job_id: str, file_path: Path):
+        """Record a fully written video file in the index"""
+        with self._lock:
+            self._index[job_id] = file_path
+
     def get_file_path(self, job_id: str) -> Path:
         """Get the file path for a job"""
-        job_dir = self.upload_dir / job_id
-        # Find the video file in the job directory
-        for file_path in job_dir.glob("video.*"):
-            return file_path
-        raise FileNotFoundError(f"No video file found for job {job_id}")
-    
+        with self._lock:
+            file_path = self._index.get(job_id)
+        if file_path is None:
+            raise FileNotFoundError(f"No video file found for job {job_id}")
+        return file_path
+
+    def get_job_dir(self, job_id: str) -> Path:
+        """Get the storage directory for a job"""
+        return self.upload_dir / job_id
+
+    def get_thumbnail_path(self, job_id: str, name: str) -> Path:
+        """Get the path of a stored thumbnail, rejecting anything outside the thumbnail dir"""
+        if Path(name).name != name or not name.endswith((".jpg", ".webp")):
+            raise FileNotFoundError(f"Invalid thumbnail name: {name}")
+        file_path = self.get_job_dir(job_id) / THUMBNAIL_DIR_NAME / name
+        if not file_path.is_file():
+            raise FileNotFoundError(f"No thumbnail {name} for job {job_id}")
+        return file_path
+
+    def get_file_size(self, job_id: str) -> int:
+        """Get the size in bytes of a job's video file, 0 if it is not stored"""
+        with self._lock:
+            file_path = self._index.get(job_id)
+        if file_path is None:
+            return 0
+        try:
+            return file_path.stat().st_size
+        except OSError:
+            return 0
+
+    def get_job_size(self, job_id: str) -> int:
+        """Get the total size in bytes of everything stored for a job"""
+        total = 0
+        for root, _, files in os.walk(self.get_job_dir(job_id)):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def indexed_jobs(self) -> Dict[str, Path]:
+        """Snapshot of the job_id -> file path index"""
+        with self._lock:
+            return dict(self._index)
+
+    def forget(self, job_id: str) -> Optional[Path]:
+        """Drop a job from the index without touching the filesystem"""
+        with self._lock:
+            return self._index.pop(job_id, None)
+
+    def delete_video(self, job_id: str, file_path: Optional[Path] = None):
+        """Delete only the source video, keeping thumbnails and other derived files"""
+        file_path = self.forget(job_id) or file_path
+        if file_path is not None:
+            file_path.unlink(missing_ok=True)
+
     def cleanup_job_files(self, job_id: str):
         """Clean up files for a job"""
-        job_dir = self.upload_dir / job_id
+        self.forget(job_id)
+        job_dir = self.get_job_dir(job_id)
         if job_dir.exists():
-            import shutil
-            shutil.rmtree(job_dir)
\ No newline at end of file
+            shutil.rmtree(job_dir, ignore_errors=True)
@@ -0,0 +1,237 @@
+import queue
+import time
+import multiprocessing as mp
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+FrameStage = Callable[[np.ndarray], Dict[str, Any]]
+
+# How long the parent waits for results before checking that its children are alive
+_POLL_SECONDS = 1.0
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without handing its lifetime to this process"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the segment; spawned children share the
+        # parent's resource tracker, so the parent's unlink still clears it
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """Ring of pre-allocated frame slots in one shared memory segment.
+
+    Only slot indices travel through the queues: the producer takes a slot
+    from ``free``, fills it in place and publishes ``(slot, frame_number)``
+    on ``ready``; a consumer reads the slot as a zero-copy numpy view and
+    returns it to ``free`` once done. When every slot is in use the
+    producer blocks on ``free``, which is the back-pressure for slow
+    consumers.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...], slots: int,
+                 free, ready, owner: bool):
+        self.shm = shm
+        self.shape = shape
+        self.slots = slots
+        self.free = free
+        self.ready = ready
+        self.owner = owner
+        self.stalls = 0
+        self._views = [
+            np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=i * int(np.prod(shape)))
+            for i in range(slots)
+        ]
+
+    @classmethod
+    def create(cls, shape: Tuple[int, ...], slots: int = 8, ctx=None) -> "SharedFrameRing":
+        ctx = ctx or mp.get_context("spawn")
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * slots)
+        free = ctx.Queue()
+        for i in range(slots):
+            free.put(i)
+        return cls(shm, shape, slots, free, ctx.Queue(), owner=True)
+
+    def spec(self) -> Dict[str, Any]:
+        """Picklable description used to attach the ring in another process"""
+        return {"name": self.shm.name, "shape": self.shape, "slots": self.slots,
+                "free": self.free, "ready": self.ready}
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Any]) -> "SharedFrameRing":
+        shm = _attach_shared_memory(spec["name"])
+        return cls(shm, spec["shape"], spec["slots"], spec["free"], spec["ready"], owner=False)
+
+    def view(self, slot: int) -> np.ndarray:
+        return self._views[slot]
+
+    # Producer side
+
+    def acquire(self) -> int:
+        """Take a free slot, blocking while consumers hold every slot"""
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            self.stalls += 1
+            return self.free.get()
+
+    def publish(self, slot: int, frame_number: int):
+        self.ready.put((slot, frame_number))
+
+    def finish(self, consumers: int):
+        """Tell each consumer there are no more frames"""
+        for _ in range(consumers):
+            self.ready.put(None)
+
+    # Consumer side
+
+    def next(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """Next (slot, frame_number) to process, None once the producer is done"""
+        return self.ready.get(timeout=timeout)
+
+    def release(self, slot: int):
+        self.free.put(slot)
+
+    def close(self):
+        self._views = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _decoder_main(video_path: str, spec: Dict[str, Any], frame_skip: int, consumers: int, stats_q):
+    """Decode sampled frames straight into ring slots"""
+    ring = SharedFrameRing.attach(spec)
+    frames = copies = 0
+    error = None
+    view = frame = None
+    try:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        frame_idx = 0
+        while True:
+            if frame_idx % frame_skip:
+                if not cap.grab():
+                    break
+                frame_idx += 1
+                continue
+            slot = ring.acquire()
+            view = ring.view(slot)
+            ret, frame = cap.read(view)
+            if not ret:
+                ring.release(slot)
+                break
+            if frame is not view:
+                # Stream resolution differs from the container header
+                np.copyto(view, cv2.resize(frame, (view.shape[1], view.shape[0])))
+                copies += 1
+            ring.publish(slot, frame_idx)
+            frames += 1
+            frame_idx += 1
+        cap.release()
+    except Exception as e:
+        error = str(e)
+    finally:
+        # Drop slot views before the segment is closed
+        view = frame = None
+        ring.finish(consumers)
+        stats_q.put({"frames": frames, "copies": copies, "stalls": ring.stalls, "error": error})
+        ring.close()
+
+
+def _worker_main(spec: Dict[str, Any], stage: FrameStage, results_q):
+    """Run the frame stage over slots until the decoder signals the end"""
+    ring = SharedFrameRing.attach(spec)
+    try:
+        while (item := ring.next()) is not None:
+            slot, frame_number = item
+            try:
+                result = stage(ring.view(slot))
+            finally:
+                ring.release(slot)
+            results_q.put((frame_number, result))
+        results_q.put(None)
+    except Exception as e:
+        results_q.put({"error": str(e)})
+    finally:
+        ring.close()
+
+
+def run_frame_pipeline(
+    video_path: Path,
+    stage: FrameStage,
+    workers: int,
+    frame_skip: int = 1,
+    slots: Optional[int] = None,
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], Dict[str, Any]]:
+    """Decode in one process and run ``stage`` on every sampled frame across worker processes.
+
+    ``stage`` must be picklable (a module-level function or a ``functools.partial``
+    of one) and must not keep references to the frame it is given. Returns the per-frame
+    results ordered by frame number together with transport statistics.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+    shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+    cap.release()
+
+    ctx = mp.get_context("spawn")
+    ring = SharedFrameRing.create(shape, slots or workers * 2, ctx)
+    results_q = ctx.Queue()
+    stats_q = ctx.Queue()
+    start = time.perf_counter()
+    decoder = ctx.Process(
+        target=_decoder_main, args=(str(video_path), ring.spec(), frame_skip, workers, stats_q),
+        daemon=True
+    )
+    consumers = [
+        ctx.Process(target=_worker_main, args=(ring.spec(), stage, results_q), daemon=True)
+        for _ in range(workers)
+    ]
+    processes = [decoder, *consumers]
+    for process in processes:
+        process.start()
+
+    results = []
+    done = 0
+    try:
+        while done < workers:
+            try:
+                item = results_q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if any(p.exitcode not in (None, 0) for p in processes):
+                    raise RuntimeError("Frame pipeline process exited unexpectedly")
+                continue
+            if item is None:
+                done += 1
+            elif isinstance(item, dict):
+                raise ValueError(f"Frame stage failed: {item['error']}")
+            else:
+                results.append(item)
+        stats = stats_q.get(timeout=_POLL_SECONDS * 5)
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        ring.close()
+
+    if stats["error"]:
+        raise ValueError(stats["error"])
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda item: item[0])
+    stats.update({
+        "workers": workers,
+        "slots": ring.slots,
+        "elapsed_seconds": elapsed,
+        "frames_per_second": stats["frames"] / elapsed if elapsed else 0.0,
+    })
+    return results, stats
@@ -1,12 +1,114 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import asyncio
 import random
+import functools
 import cv2
 import numpy as np
 from datetime import datetime
 
+from .file_storage import THUMBNAIL_DIR_NAME
+from .feature_store import write_features
+from .frame_transport import FrameStage, run_frame_pipeline
+from .profiling import current_profiler, profile_stage, profile_frame, discard_frame
+
+THUMBNAIL_WIDTH = 320
+
+
+def encode_thumbnail(frame: np.ndarray) -> Optional[bytes]:
+    """JPEG-encode a downscaled copy of a frame"""
+    height, width = frame.shape[:2]
+    if width > THUMBNAIL_WIDTH:
+        size = (THUMBNAIL_WIDTH, max(1, round(height * THUMBNAIL_WIDTH / width)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return encoded.tobytes() if ok else None
+
+
+class ThumbnailWriter:
+    """Saves small JPEG previews of flagged frames next to the job's video.
+
+    Frames are handed over from the runner's own decode loop, so no second
+    pass over the video is needed. Runners only sample a few dozen frames
+    and a preview is a few KB, so every flagged sampled frame is kept.
+    """
+
+    def __init__(self, video_path: Path):
+        self.thumb_dir = video_path.parent / THUMBNAIL_DIR_NAME
+        self.thumbnails: list[Dict[str, Any]] = []
+
+    def save(self, frame: np.ndarray, frame_number: int, reasons: list[str]):
+        self.save_encoded(encode_thumbnail(frame), frame_number, reasons)
+
+    def save_encoded(self, data: Optional[bytes], frame_number: int, reasons: list[str]):
+        """Store a thumbnail that was already encoded, e.g. by a frame worker process"""
+        if data is None:
+            return
+        self.thumb_dir.mkdir(exist_ok=True)
+        name = f"frame_{frame_number:06d}.jpg"
+        (self.thumb_dir / name).write_bytes(data)
+        self.thumbnails.append({"frame_number": frame_number, "reasons": reasons, "file": name})
+
+
+def railway_frame_stage(frame: np.ndarray) -> Dict[str, Any]:
+    """Per-frame railway detection: track lines, bright (train) and dark (obstacle) blobs"""
+    # Convert to grayscale
+    with profile_stage("cvtColor"):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    
+    # Detect horizontal lines (potential railway tracks)
+    with profile_stage("Canny"):
+        edges = cv2.Canny(gray, 50, 150)
+    with profile_stage("HoughLinesP"):
+        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, minLineLength=100, maxLineGap=10)
+    
+    horizontal_lines = 0
+    with profile_stage("line_filter"):
+        if lines is not None:
+            for line in lines:
+                x1, y1, x2, y2 = line[0]
+                angle = abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
+                if angle < 15 or angle > 165:  # Horizontal lines
+                    horizontal_lines += 1
+    
+    # Detect bright objects (potential trains)
+    with profile_stage("threshold"):
+        bright_objects = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)[1]
+    with profile_stage("findContours"):
+        bright_regions = cv2.findContours(bright_objects, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+    with profile_stage("contourArea"):
+        large_bright_objects = len([c for c in bright_regions if cv2.contourArea(c) > 1000])
+    
+    # Detect dark objects (potential obstacles)
+    with profile_stage("threshold"):
+        dark_objects = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY_INV)[1]
+    with profile_stage("findContours"):
+        dark_regions = cv2.findContours(dark_objects, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+    with profile_stage("contourArea"):
+        large_dark_objects = len([c for c in dark_regions if cv2.contourArea(c) > 500])
+    
+    reasons = []
+    if large_bright_objects > 0:
+        reasons.append("train")
+    if large_dark_objects > 0:
+        reasons.append("obstacle")
+    
+    return {
+        "track_lines": horizontal_lines,
+        "bright_objects": large_bright_objects,
+        "dark_objects": large_dark_objects,
+        "reasons": reasons,
+    }
+
+
+def _stage_with_thumbnail(stage: FrameStage, frame: np.ndarray) -> Dict[str, Any]:
+    """Run a frame stage in a worker process and encode flagged frames there, while the frame is at hand"""
+    result = stage(frame)
+    if result.get("reasons"):
+        result["thumbnail"] = encode_thumbnail(frame)
+    return result
+
 
 class ModelRunner(ABC):
     @abstractmethod
@@ -64,38 +166,57 @@ class OpenCVModelRunner(ModelRunner):
             
             frame_idx = 0
             prev_frame = None
+            thumbnails = ThumbnailWriter(video_path)
+            features = {"frame_number": [], "edge_density": [], "motion": []}
             
             while True:
-                ret, frame = cap.read()
+                sampled = frame_idx % frame_skip == 0
+                if sampled:
+                    profile_frame(frame_idx)
+                with profile_stage("decode" if sampled else "decode_skipped"):
+                    ret, frame = cap.read()
                 if not ret:
+                    if sampled:
+                        discard_frame()
                     break
                 
-                if frame_idx % frame_skip == 0:
+                if sampled:
                     # Convert to grayscale for analysis
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    with profile_stage("cvtColor"):
+                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
                     
                     # Basic motion detection
+                    motion_amount = 0.0
                     if prev_frame is not None:
-                        diff = cv2.absdiff(prev_frame, gray)
-                        motion_amount = np.mean(diff)
+                        with profile_stage("absdiff"):
+                            diff = cv2.absdiff(prev_frame, gray)
+                            motion_amount = np.mean(diff)
                         if motion_amount > 30:  # Threshold for motion detection
                             motion_detected = True
                     
                     # Edge detection
-                    edges = cv2.Canny(gray, 50, 150)
-                    edge_density = np.sum(edges > 0) / (width * height)
+                    with profile_stage("Canny"):
+                        edges = cv2.Canny(gray, 50, 150)
+                        edge_density = np.sum(edges > 0) / (width * height)
                     
+                    frame_motion = bool(motion_amount > 30) if prev_frame is not None else False
                     frame_analysis.append({
                         "frame_number": frame_idx,
-                        "motion_detected": motion_amount > 30 if prev_frame is not None else False,
+                        "motion_detected": frame_motion,
                         "edge_density": float(edge_density)
                     })
+                    if frame_motion:
+                        thumbnails.save(frame, frame_idx, ["motion"])
+                    features["frame_number"].append(frame_idx)
+                    features["edge_density"].append(edge_density)
+                    features["motion"].append(motion_amount)
                     
                     prev_frame = gray
                 
                 frame_idx += 1
             
             cap.release()
+            write_features(video_path.parent, features, fps)
             
             # Calculate processing time
             processing_time = (datetime.now() - start_time).total_seconds()
@@ -117,7 +238,8 @@ class OpenCVModelRunner(ModelRunner):
                 "processing_time": f"{processing_time:.2f}s",
                 "processed_at": datetime.now().isoformat(),
                 "model_name": self.get_model_name(),
-                "frame_analysis": frame_analysis[:10]  # Return first 10 frames for details
+                "frame_analysis": frame_analysis[:10],  # Return first 10 frames for details
+                "thumbnails": thumbnails.thumbnails
             }
             
         except Exception as e:
@@ -125,6 +247,11 @@ class OpenCVModelRunner(ModelRunner):
 
 
 class RailwayDetectionModelRunner(ModelRunner):
+    def __init__(self, processes: int = 0):
+        # With processes > 1 frames are decoded in one process and analyzed in a
+        # pool of workers over shared memory instead of inline on this thread
+        self.processes = processes
+    
     def get_model_name(self) -> str:
         return "railway_detection"
     
@@ -145,52 +272,56 @@ class RailwayDetectionModelRunner(ModelRunner):
             width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             
-            # Railway-specific analysis
-            track_detections = []
-            train_detections = []
-            obstacle_detections = []
-            
             frame_skip = max(1, frame_count // 30)  # Analyze ~30 frames
-            frame_idx = 0
+            thumbnails = ThumbnailWriter(video_path)
             
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_idx % frame_skip == 0:
-                    # Convert to grayscale
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    
-                    # Detect horizontal lines (potential railway tracks)
-                    edges = cv2.Canny(gray, 50, 150)
-                    lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, minLineLength=100, maxLineGap=10)
-                    
-                    horizontal_lines = 0
-                    if lines is not None:
-                        for line in lines:
-                            x1, y1, x2, y2 = line[0]
-                            angle = abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
-                            if angle < 15 or angle > 165:  # Horizontal lines
-                                horizontal_lines += 1
+            # Profiled runs stay inline so stage timings and cProfile see every frame
+            if self.processes > 1 and current_profiler.get() is None:
+                cap.release()
+                loop = asyncio.get_running_loop()
+                frame_results, _ = await loop.run_in_executor(
+                    None, run_frame_pipeline, video_path,
+                    functools.partial(_stage_with_thumbnail, railway_frame_stage),
+                    self.processes, frame_skip
+                )
+                for frame_idx, detection in frame_results:
+                    thumbnails.save_encoded(detection.pop("thumbnail", None), frame_idx, detection["reasons"])
+            else:
+                frame_results = []
+                frame_idx = 0
+                while True:
+                    sampled = frame_idx % frame_skip == 0
+                    if sampled:
+                        profile_frame(frame_idx)
+                    with profile_stage("decode" if sampled else "decode_skipped"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        if sampled:
+                            discard_frame()
+                        break
                     
-                    # Detect bright objects (potential trains)
-                    bright_objects = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)[1]
-                    bright_regions = cv2.findContours(bright_objects, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
-                    large_bright_objects = len([c for c in bright_regions if cv2.contourArea(c) > 1000])
+                    if sampled:
+                        detection = railway_frame_stage(frame)
+                        frame_results.append((frame_idx, detection))
+                        if detection["reasons"]:
+                            thumbnails.save(frame, frame_idx, detection["reasons"])
                     
-                    # Detect dark objects (potential obstacles)
-                    dark_objects = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY_INV)[1]
-                    dark_regions = cv2.findContours(dark_objects, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
-                    large_dark_objects = len([c for c in dark_regions if cv2.contourArea(c) > 500])
-                    
-                    track_detections.append(horizontal_lines)
-                    train_detections.append(large_bright_objects)
-                    obstacle_detections.append(large_dark_objects)
+                    frame_idx += 1
                 
-                frame_idx += 1
+                cap.release()
             
-            cap.release()
+            # Railway-specific analysis
+            frame_numbers = [frame_idx for frame_idx, _ in frame_results]
+            track_detections = [d["track_lines"] for _, d in frame_results]
+            train_detections = [d["bright_objects"] for _, d in frame_results]
+            obstacle_detections = [d["dark_objects"] for _, d in frame_results]
+            
+            write_features(video_path.parent, {
+                "frame_number": frame_numbers,
+                "track_lines": track_detections,
+                "bright_objects": train_detections,
+                "dark_objects": obstacle_detections,
+            }, fps)
             
             # Calculate processing time
             processing_time = (datetime.now() - start_time).total_seconds()
@@ -218,7 +349,8 @@ class RailwayDetectionModelRunner(ModelRunner):
                 },
                 "processing_time": f"{processing_time:.2f}s",
                 "processed_at": datetime.now().isoformat(),
-                "model_name": self.get_model_name()
+                "model_name": self.get_model_name(),
+                "thumbnails": thumbnails.thumbnails
             }
             
         except Exception as e:
@@ -0,0 +1,180 @@
+import io
+import json
+import time
+import asyncio
+import cProfile
+import threading
+import contextlib
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+PROFILE_DIR_NAME = "profile"
+STAGES_FILE = "stages.json"
+PSTATS_FILE = "profile.pstats"
+
+# Profiler of the job running in the current task; None when profiling is off
+current_profiler: ContextVar[Optional["StageProfiler"]] = ContextVar("current_profiler", default=None)
+
+_NO_PROFILE = contextlib.nullcontext()
+
+# Only one cProfile session can be enabled at a time; later jobs get stage timings only
+_cprofile_slot = threading.Lock()
+
+
+class _StageTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "StageProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter_ns() - self.start)
+
+
+class StageProfiler:
+    """Per-frame wall time of named pipeline stages, plus an optional cProfile of the whole run.
+
+    Runners mark stages with :func:`profile_stage` and sampled frames with
+    :func:`profile_frame`; both are no-ops unless a profiler is active in the
+    current context, so unprofiled jobs pay only a context variable lookup.
+
+    cProfile hooks a whole thread, so :meth:`run` executes the job on its own
+    thread and event loop to keep other requests out of the dump. On Python
+    3.12+ cProfile is interpreter-wide and other threads can still appear.
+    """
+
+    def __init__(self, name: str, use_cprofile: bool = True):
+        self.name = name
+        self.frames: List[Dict[str, Any]] = []
+        self.totals: Dict[str, int] = {}
+        self._current: Optional[Dict[str, int]] = None
+        self._cprofile = cProfile.Profile() if use_cprofile else None
+        self._started = 0
+        self.elapsed_ns = 0
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make this profiler current and run cProfile for the duration if no other job holds it"""
+        token = current_profiler.set(self)
+        cprofile = self._cprofile
+        if cprofile is not None and not _cprofile_slot.acquire(blocking=False):
+            # Enabling it here would replace the running session's hook
+            self._cprofile = cprofile = None
+        self._started = time.perf_counter_ns()
+        if cprofile is not None:
+            cprofile.enable()
+        try:
+            yield self
+        finally:
+            if cprofile is not None:
+                cprofile.disable()
+                _cprofile_slot.release()
+            self.elapsed_ns = time.perf_counter_ns() - self._started
+            current_profiler.reset(token)
+
+    def run(self, func, *args):
+        """Run the coroutine function on a fresh event loop in the calling thread, profiled.
+
+        Meant to be called from a worker thread so that nothing else the
+        server does runs on the thread being profiled.
+        """
+        with self.activate():
+            return asyncio.run(func(*args))
+
+    def start_frame(self, frame_number: int):
+        self._current = {}
+        self.frames.append({"frame_number": frame_number, "stages_ns": self._current})
+
+    def discard_frame(self):
+        """Drop the frame started last, along with the time attributed to it"""
+        if self._current is None:
+            return
+        for stage, duration_ns in self._current.items():
+            self.totals[stage] -= duration_ns
+        self.frames.pop()
+        self._current = None
+
+    def add(self, stage: str, duration_ns: int):
+        self.totals[stage] = self.totals.get(stage, 0) + duration_ns
+        if self._current is not None:
+            self._current[stage] = self._current.get(stage, 0) + duration_ns
+
+    def summary(self) -> Dict[str, Any]:
+        """Total, mean and p95 milliseconds per stage over the sampled frames"""
+        stages = {}
+        for stage, total in self.totals.items():
+            per_frame = np.array([f["stages_ns"].get(stage, 0) for f in self.frames], dtype=np.int64)
+            stages[stage] = {
+                "total_ms": total / 1e6,
+                "mean_ms": float(per_frame.mean()) / 1e6 if len(per_frame) else 0.0,
+                "p95_ms": float(np.percentile(per_frame, 95)) / 1e6 if len(per_frame) else 0.0,
+                "max_ms": float(per_frame.max()) / 1e6 if len(per_frame) else 0.0,
+            }
+        return {
+            "runner": self.name,
+            "elapsed_ms": self.elapsed_ns / 1e6,
+            "frames_sampled": len(self.frames),
+            "cprofile": self._cprofile is not None,
+            "stages": stages,
+        }
+
+    def collapsed_stacks(self) -> str:
+        """Stage timings in collapsed-stack format (microseconds) for flamegraph tools"""
+        lines = [
+            f"{self.name};frame;{stage} {total // 1000}"
+            for stage, total in sorted(self.totals.items())
+        ]
+        untracked = self.elapsed_ns - sum(self.totals.values())
+        if untracked > 0:
+            lines.append(f"{self.name};other {untracked // 1000}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, job_dir: Path) -> Path:
+        """Write the per-frame breakdown and pstats dump into the job directory"""
+        profile_dir = job_dir / PROFILE_DIR_NAME
+        profile_dir.mkdir(exist_ok=True)
+        (profile_dir / STAGES_FILE).write_text(json.dumps({
+            "summary": self.summary(),
+            "frames": self.frames,
+            "collapsed": self.collapsed_stacks(),
+        }))
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(str(profile_dir / PSTATS_FILE))
+        return profile_dir
+
+
+def profile_stage(name: str):
+    """Context manager timing one stage of the current frame when profiling is on"""
+    profiler = current_profiler.get()
+    if profiler is None:
+        return _NO_PROFILE
+    return _StageTimer(profiler, name)
+
+
+def profile_frame(frame_number: int):
+    """Start attributing stage timings to a newly sampled frame"""
+    profiler = current_profiler.get()
+    if profiler is not None:
+        profiler.start_frame(frame_number)
+
+
+def discard_frame():
+    """Forget the frame just started, used when its read hits the end of the video"""
+    profiler = current_profiler.get()
+    if profiler is not None:
+        profiler.discard_frame()
+
+
+def pstats_text(pstats_path: Path, limit: int = 40) -> str:
+    """Human readable cumulative-time report of a pstats dump"""
+    import pstats
+    out = io.StringIO()
+    pstats.Stats(str(pstats_path), stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
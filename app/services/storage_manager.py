@@ -0,0 +1,310 @@
+import re
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from .file_storage import FileStorageService
+from .feature_store import FEATURE_DIR_NAME, SUMMARY_FILE
+from ..models.schemas import JobStatus
+
+logger = logging.getLogger(__name__)
+
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+
+class QuotaExceededError(Exception):
+    """Raised when new data would not fit under the storage quota"""
+
+
+def parse_size(value: str) -> int:
+    """Parse a human readable size such as "100MB" or "10GB" into bytes"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?B?)\s*", str(value).upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    if unit and not unit.endswith("B"):
+        unit += "B"
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+class StorageManager:
+    """Lifecycle management for uploaded videos.
+
+    Tracks every stored job with its on-disk size (the source video plus
+    thumbnails, features and profiles), status and last access time and
+    periodically reclaims space: jobs past their retention period are
+    removed first, then source videos of finished jobs are evicted in LRU
+    order until usage is back under the quota. A pass is also triggered as
+    soon as a new job pushes usage over the quota. Deletions run on a
+    dedicated worker thread so the event loop never blocks on ``rmtree``.
+    """
+
+    def __init__(
+        self,
+        storage_service: FileStorageService,
+        quota_bytes: int,
+        retention: Optional[Dict[JobStatus, timedelta]] = None,
+        gc_interval: float = 300.0,
+    ):
+        self.storage_service = storage_service
+        self.quota_bytes = quota_bytes
+        self.retention = retention or {
+            JobStatus.SUCCEEDED: timedelta(days=7),
+            JobStatus.FAILED: timedelta(days=1),
+        }
+        self.gc_interval = gc_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-gc")
+        self._gc_task: Optional[asyncio.Task] = None
+        self._pending_collect: Optional[asyncio.Task] = None
+        # (timestamp, bytes) of recent deletions, used for the reclaim rate
+        self._reclaim_log: deque = deque(maxlen=1024)
+        self._bytes_reclaimed_total = 0
+        self._files_reclaimed_total = 0
+        self._evictions_total = 0
+        self._expirations_total = 0
+        self._gc_runs = 0
+        self._last_gc_at: Optional[datetime] = None
+        self._expire_callbacks: List[Callable[[str], None]] = []
+        self._evict_callbacks: List[Callable[[str], None]] = []
+        self._collect_callbacks: List[Callable[[], None]] = []
+        self._adopt_existing_files()
+
+    def _adopt_existing_files(self):
+        """Track jobs left over from previous runs so their retention clock keeps running.
+
+        Jobs whose feature summary was written finished successfully and keep
+        their original creation time; anything else is treated as failed and
+        ages from the time its files were last written.
+        """
+        indexed = self.storage_service.indexed_jobs()
+        for job_dir in self.storage_service.upload_dir.iterdir():
+            if not job_dir.is_dir() or any(job_dir.glob("video.*.part")):
+                continue
+            job_id = job_dir.name
+            status, stored_at = JobStatus.FAILED, None
+            try:
+                summary = json.loads((job_dir / FEATURE_DIR_NAME / SUMMARY_FILE).read_text())
+                status = JobStatus.SUCCEEDED
+                stored_at = datetime.fromisoformat(summary["created_at"])
+            except (OSError, ValueError, KeyError):
+                pass
+            if stored_at is None:
+                try:
+                    stored_at = datetime.fromtimestamp((indexed.get(job_id) or job_dir).stat().st_mtime)
+                except OSError:
+                    stored_at = datetime.now()
+            self._entries[job_id] = {
+                "size": self.storage_service.get_job_size(job_id),
+                "video_size": self.storage_service.get_file_size(job_id),
+                "status": status,
+                "stored_at": stored_at,
+                "last_access": time.monotonic(),
+                # The persisted features are all that is left of the result after a restart
+                "result_stored": status == JobStatus.SUCCEEDED,
+                "video_evicted": job_id not in indexed,
+            }
+
+    def add_expire_callback(self, callback: Callable[[str], None]):
+        """Register a callback invoked with the job_id after a job's files have been removed"""
+        self._expire_callbacks.append(callback)
+
+    def add_evict_callback(self, callback: Callable[[str], None]):
+        """Register a callback invoked with the job_id after a job's source video has been evicted"""
+        self._evict_callbacks.append(callback)
+
+    def add_collect_callback(self, callback: Callable[[], None]):
+        """Register a callback invoked at the start of every GC pass"""
+        self._collect_callbacks.append(callback)
+
+    def track(self, job_id: str):
+        """Start tracking a freshly stored job, collecting right away if it goes over quota"""
+        with self._lock:
+            self._entries[job_id] = {
+                "size": self.storage_service.get_job_size(job_id),
+                "video_size": self.storage_service.get_file_size(job_id),
+                "status": JobStatus.RUNNING,
+                "stored_at": datetime.now(),
+                "last_access": time.monotonic(),
+                "result_stored": False,
+            }
+        if self.usage_bytes() > self.quota_bytes:
+            self._collect_soon()
+
+    def touch(self, job_id: str):
+        """Mark a job's video as recently used"""
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None:
+                entry["last_access"] = time.monotonic()
+
+    def mark_finished(self, job_id: str, status: JobStatus, result_stored: bool = False):
+        """Record the final status of a job; only finished jobs are eligible for reclaim"""
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None:
+                entry["status"] = status
+                entry["result_stored"] = result_stored
+                entry["finished_at"] = datetime.now()
+                # Thumbnails, features and profiles are written by now
+                entry["size"] = self.storage_service.get_job_size(job_id)
+        if self.usage_bytes() > self.quota_bytes:
+            self._collect_soon()
+
+    def usage_bytes(self) -> int:
+        """Bytes on disk across all tracked jobs"""
+        with self._lock:
+            return sum(entry["size"] for entry in self._entries.values())
+
+    def has_capacity(self, size: int) -> bool:
+        """Whether ``size`` more bytes fit under the quota once evictable videos are reclaimed"""
+        with self._lock:
+            usage = sum(entry["size"] for entry in self._entries.values())
+            evictable = sum(
+                entry["video_size"] for entry in self._entries.values()
+                if entry["status"] == JobStatus.SUCCEEDED and entry["result_stored"]
+            )
+        return usage - evictable + size <= self.quota_bytes
+
+    def _select_victims(self, now: datetime) -> List[tuple]:
+        """Pick (job_id, size, reason, file_path) tuples to delete, expired jobs first, then LRU"""
+        victims = []
+        with self._lock:
+            usage = sum(entry["size"] for entry in self._entries.values())
+            remaining = {}
+            for job_id, entry in self._entries.items():
+                ttl = self.retention.get(entry["status"])
+                reference = entry.get("finished_at", entry["stored_at"])
+                if ttl is not None and now - reference >= ttl:
+                    victims.append((job_id, entry["size"], "expired"))
+                    usage -= entry["size"]
+                else:
+                    remaining[job_id] = entry
+
+            if usage > self.quota_bytes:
+                # Only evict source videos whose analysis result is already stored
+                candidates = sorted(
+                    (
+                        (job_id, entry) for job_id, entry in remaining.items()
+                        if entry["status"] == JobStatus.SUCCEEDED
+                        and entry["result_stored"]
+                        and entry["video_size"]
+                    ),
+                    key=lambda item: item[1]["last_access"],
+                )
+                for job_id, entry in candidates:
+                    if usage <= self.quota_bytes:
+                        break
+                    victims.append((job_id, entry["video_size"], "evicted"))
+                    usage -= entry["video_size"]
+
+            selected = []
+            for job_id, size, reason in victims:
+                if reason == "expired":
+                    self._entries.pop(job_id, None)
+                else:
+                    # Thumbnails stay until the job expires, only the video goes
+                    entry = self._entries[job_id]
+                    entry["video_evicted"] = True
+                    entry["size"] -= entry["video_size"]
+                    entry["video_size"] = 0
+                # Unindex now so lookups stop resolving before the files are gone
+                selected.append((job_id, size, reason, self.storage_service.forget(job_id)))
+        return selected
+
+    def _delete_sync(self, job_id: str, reason: str, file_path: Optional[Path]):
+        if reason == "evicted":
+            self.storage_service.delete_video(job_id, file_path)
+        else:
+            self.storage_service.cleanup_job_files(job_id)
+
+    async def collect(self) -> Dict[str, Any]:
+        """Run one GC pass; file deletion happens on the storage worker thread"""
+        for callback in self._collect_callbacks:
+            callback()
+        victims = self._select_victims(datetime.now())
+        loop = asyncio.get_running_loop()
+        reclaimed = 0
+        for job_id, size, reason, file_path in victims:
+            try:
+                await loop.run_in_executor(self._executor, self._delete_sync, job_id, reason, file_path)
+            except Exception:
+                logger.exception("Failed to delete files for job %s", job_id)
+                continue
+            reclaimed += size
+            with self._lock:
+                self._reclaim_log.append((time.monotonic(), size))
+                self._bytes_reclaimed_total += size
+                self._files_reclaimed_total += 1
+                if reason == "evicted":
+                    self._evictions_total += 1
+                else:
+                    self._expirations_total += 1
+            callbacks = self._expire_callbacks if reason == "expired" else self._evict_callbacks
+            for callback in callbacks:
+                callback(job_id)
+        with self._lock:
+            self._gc_runs += 1
+            self._last_gc_at = datetime.now()
+        return {"files_deleted": len(victims), "bytes_reclaimed": reclaimed}
+
+    async def _collect_logged(self):
+        try:
+            await self.collect()
+        except Exception:
+            logger.exception("Storage GC pass failed")
+
+    def _collect_soon(self):
+        """Schedule an extra GC pass unless one is already pending"""
+        if self._pending_collect is None or self._pending_collect.done():
+            self._pending_collect = asyncio.get_running_loop().create_task(self._collect_logged())
+
+    async def _gc_loop(self):
+        while True:
+            await self._collect_logged()
+            await asyncio.sleep(self.gc_interval)
+
+    def start(self):
+        """Start the periodic GC task on the running event loop"""
+        if self._gc_task is None or self._gc_task.done():
+            self._gc_task = asyncio.get_running_loop().create_task(self._gc_loop())
+
+    async def stop(self):
+        for task in (self._gc_task, self._pending_collect):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._gc_task = self._pending_collect = None
+        self._executor.shutdown(wait=True)
+
+    def get_metrics(self, window_seconds: float = 3600.0) -> Dict[str, Any]:
+        """Disk usage and reclaim statistics"""
+        now = time.monotonic()
+        usage = self.usage_bytes()
+        with self._lock:
+            recent = sum(size for ts, size in self._reclaim_log if now - ts <= window_seconds)
+            return {
+                "usage_bytes": usage,
+                "quota_bytes": self.quota_bytes,
+                "usage_ratio": usage / self.quota_bytes if self.quota_bytes else 0.0,
+                "video_bytes": sum(entry["video_size"] for entry in self._entries.values()),
+                "files_stored": sum(1 for entry in self._entries.values() if not entry.get("video_evicted")),
+                "bytes_reclaimed_total": self._bytes_reclaimed_total,
+                "files_reclaimed_total": self._files_reclaimed_total,
+                "evictions_total": self._evictions_total,
+                "expirations_total": self._expirations_total,
+                "reclaim_rate_bytes_per_sec": recent / window_seconds,
+                "gc_runs": self._gc_runs,
+                "last_gc_at": self._last_gc_at,
+            }
@@ -7,41 +7,36 @@ from concurrent.futures import ThreadPoolExecutor
 
 from .file_storage import FileStorageService
 from .model_runner import ModelRegistry
+from .storage_manager import StorageManager
+from .feature_store import FeatureStore
+from .profiling import StageProfiler
 from ..models.schemas import JobStatus
 
 
 class VideoAnalysisService:
-    def __init__(self, storage_service: FileStorageService, model_registry: ModelRegistry):
+    def __init__(
+        self,
+        storage_service: FileStorageService,
+        model_registry: ModelRegistry,
+        storage_manager: Optional[StorageManager] = None,
+        feature_store: Optional[FeatureStore] = None,
+    ):
         self.storage_service = storage_service
         self.model_registry = model_registry
+        self.storage_manager = storage_manager
+        self.feature_store = feature_store
         self.jobs: Dict[str, Dict[str, Any]] = {}
         self.executor = ThreadPoolExecutor(max_workers=4)
     
-    async def submit_job(self, file, model_name: str, original_filename: str) -> str:
+    async def submit_job(self, file, model_name: str, original_filename: str, profile: bool = False) -> str:
         """Submit a video analysis job"""
         job_id = str(uuid.uuid4())
-        
-        # Initialize job record
-        self.jobs[job_id] = {
-            "status": JobStatus.PENDING,
-            "message": None,
-            "result": None,
-            "created_at": datetime.now(),
-            "completed_at": None,
-            "model_name": model_name,
-            "original_filename": original_filename
-        }
+        self._create_job_record(job_id, model_name, original_filename)
         
         try:
             # Store file
             file_path = await self.storage_service.store_file(file, job_id, original_filename)
-            
-            # Update status
-            self.jobs[job_id]["status"] = JobStatus.RUNNING
-            self.jobs[job_id]["file_path"] = file_path
-            
-            # Start processing asynchronously
-            asyncio.create_task(self._process_video(job_id, file_path, model_name))
+            self._start_job(job_id, file_path, model_name, profile)
             
         except Exception as e:
             self.jobs[job_id]["status"] = JobStatus.FAILED
@@ -50,20 +45,91 @@ class VideoAnalysisService:
         
         return job_id
     
-    async def _process_video(self, job_id: str, video_path: Path, model_name: str):
+    def submit_stored_job(self, job_id: str, file_path: Path, model_name: str, original_filename: str,
+                          profile: bool = False) -> str:
+        """Submit a job for a video that has already been written to storage"""
+        self._create_job_record(job_id, model_name, original_filename)
+        self.storage_service.register_file(job_id, file_path)
+        self._start_job(job_id, file_path, model_name, profile)
+        return job_id
+    
+    def _create_job_record(self, job_id: str, model_name: str, original_filename: str):
+        """Initialize job record"""
+        self.jobs[job_id] = {
+            "status": JobStatus.PENDING,
+            "message": None,
+            "result": None,
+            "created_at": datetime.now(),
+            "completed_at": None,
+            "model_name": model_name,
+            "original_filename": original_filename,
+            "profile": None,
+            "video_stored": False,
+            "thumbnails_stored": False
+        }
+    
+    def _start_job(self, job_id: str, file_path: Path, model_name: str, profile: bool = False):
+        """Mark a stored job as running and schedule its processing"""
+        if self.storage_manager is not None:
+            self.storage_manager.track(job_id)
+        
+        # Update status
+        self.jobs[job_id]["status"] = JobStatus.RUNNING
+        self.jobs[job_id]["file_path"] = file_path
+        self.jobs[job_id]["video_stored"] = True
+        self.jobs[job_id]["thumbnails_stored"] = True
+        
+        # Start processing asynchronously
+        asyncio.create_task(self._process_video(job_id, file_path, model_name, profile))
+    
+    async def _process_video(self, job_id: str, video_path: Path, model_name: str, profile: bool = False):
         """Process video asynchronously"""
+        profiler = StageProfiler(model_name) if profile else None
         try:
             runner = self.model_registry.get_runner(model_name)
-            result = await runner.run(video_path)
+            if profiler is not None:
+                # On a worker thread with its own loop, so cProfile only sees this job
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.executor, profiler.run, runner.run, video_path)
+            else:
+                result = await runner.run(video_path)
             
             self.jobs[job_id]["status"] = JobStatus.SUCCEEDED
             self.jobs[job_id]["result"] = result
             self.jobs[job_id]["completed_at"] = datetime.now()
             
+            if self.feature_store is not None:
+                job = self.jobs[job_id]
+                self.feature_store.register(
+                    job_id, model_name, job["created_at"], job.get("original_filename")
+                )
+            
         except Exception as e:
             self.jobs[job_id]["status"] = JobStatus.FAILED
             self.jobs[job_id]["message"] = str(e)
             self.jobs[job_id]["completed_at"] = datetime.now()
+        
+        if profiler is not None:
+            # Kept for failed jobs too, pathological inputs are what profiling is for
+            profiler.save(video_path.parent)
+            self.jobs[job_id]["profile"] = profiler.summary()
+        
+        if self.storage_manager is not None:
+            job = self.jobs[job_id]
+            self.storage_manager.mark_finished(
+                job_id, job["status"], result_stored=job["result"] is not None
+            )
+    
+    def mark_video_evicted(self, job_id: str):
+        """Record that the job's source video was reclaimed; thumbnails remain"""
+        if job_id in self.jobs:
+            self.jobs[job_id]["video_stored"] = False
+    
+    def mark_files_expired(self, job_id: str):
+        """Record that all of the job's stored files were reclaimed"""
+        if job_id in self.jobs:
+            self.jobs[job_id]["video_stored"] = False
+            self.jobs[job_id]["thumbnails_stored"] = False
     
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job status and basic info"""
@@ -91,7 +157,10 @@ class VideoAnalysisService:
             "created_at": job.get("created_at"),
             "completed_at": job["completed_at"],
             "model_name": job.get("model_name"),
-            "original_filename": job.get("original_filename")
+            "original_filename": job.get("original_filename"),
+            "profile": job.get("profile"),
+            "video_stored": job.get("video_stored", False),
+            "thumbnails_stored": job.get("thumbnails_stored", False)
         }
     
     def list_models(self) -> list[str]:
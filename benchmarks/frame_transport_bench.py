@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+帧传输基准测试 - 共享内存环形缓冲 vs. pickle管道
+
+Moves 1080p BGR frames from one producer process to N analysis workers
+through either SharedFrameRing or pickled bytes over pipes and reports
+frames per second and measured per-frame copies. Two sources are run:
+synthetic frames, and a real video file decoded in the producer, where the
+shared memory side goes through ``run_frame_pipeline`` and its
+``cap.read(view)`` decoder.
+
+Copies are counted where bytes are actually moved: slot writes, the
+serialized pickle payload, bytes written to and read from the pipe, the
+decoder's fallback copy into a slot, and any frame a worker receives that
+owns its memory instead of viewing a transport buffer.
+
+    python benchmarks/frame_transport_bench.py --frames 600 --workers 4
+    python benchmarks/frame_transport_bench.py --stage railway --video sample.mp4
+"""
+import argparse
+import functools
+import multiprocessing as mp
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.frame_transport import SharedFrameRing, _worker_main, run_frame_pipeline  # noqa: E402
+from app.services.model_runner import railway_frame_stage  # noqa: E402
+
+SHAPE = (1080, 1920, 3)
+
+
+def light_stage(frame: np.ndarray) -> dict:
+    """Touch a sparse sample of the frame so transport cost dominates"""
+    return {"mean": float(frame[::64, ::64].mean())}
+
+
+STAGES = {"light": light_stage, "railway": railway_frame_stage}
+
+
+def _owns_copy(frame: np.ndarray) -> bool:
+    """Whether the frame lives in a numpy allocation rather than a view of a transport buffer"""
+    base = frame
+    while isinstance(base, np.ndarray):
+        if base.flags.owndata:
+            return True
+        base = base.base
+    return False
+
+
+def counting_stage(stage, frame: np.ndarray) -> dict:
+    """Run ``stage`` and report the bytes copied to hand this frame to the worker"""
+    return {"result": stage(frame), "copied_bytes": frame.nbytes if _owns_copy(frame) else 0}
+
+
+def _synthetic_frames(frames: int):
+    base = np.random.default_rng(0).integers(0, 255, SHAPE, dtype=np.uint8)
+    for _ in range(frames):
+        yield base
+
+
+def _video_frames(video_path: str):
+    cap = cv2.VideoCapture(video_path)
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+    cap.release()
+
+
+def write_test_video(path: Path, frames: int) -> Path:
+    """Write a moving 1080p MJPG clip so the video runs have something real to decode"""
+    rng = np.random.default_rng(0)
+    base = cv2.resize(rng.integers(0, 255, (135, 240, 3), dtype=np.uint8), (SHAPE[1], SHAPE[0]),
+                      interpolation=cv2.INTER_NEAREST)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (SHAPE[1], SHAPE[0]))
+    for i in range(frames):
+        writer.write(np.roll(base, i * 8, axis=1))
+    writer.release()
+    return path
+
+
+def _shm_producer(spec, frames: int, consumers: int, stats_q):
+    ring = SharedFrameRing.attach(spec)
+    copied = 0
+    for i, frame in enumerate(_synthetic_frames(frames)):
+        slot = ring.acquire()
+        np.copyto(ring.view(slot), frame)
+        copied += frame.nbytes
+        ring.publish(slot, i)
+    ring.finish(consumers)
+    stats_q.put({"stalls": ring.stalls, "copied_bytes": copied})
+    ring.close()
+
+
+def _pickle_producer(conns, source: tuple, stats_q):
+    """Round-robin pickled frames over one pipe per worker; pipe back-pressure blocks the producer"""
+    frames = _synthetic_frames(source[1]) if source[0] == "synthetic" else _video_frames(source[1])
+    copied = 0
+    for i, frame in enumerate(frames):
+        payload = pickle.dumps((i, frame), protocol=pickle.HIGHEST_PROTOCOL)
+        # One copy into the payload, one more into the pipe
+        conns[i % len(conns)].send_bytes(payload)
+        copied += 2 * len(payload)
+    for conn in conns:
+        conn.send_bytes(pickle.dumps(None))
+    stats_q.put({"stalls": None, "copied_bytes": copied})
+
+
+def _pickle_worker(conn, stage, results_q):
+    while True:
+        data = conn.recv_bytes()
+        item = pickle.loads(data)
+        if item is None:
+            break
+        frame_number, frame = item
+        result = stage(frame)
+        # recv_bytes copies the frame out of the pipe into a fresh buffer
+        result["copied_bytes"] += len(data)
+        results_q.put((frame_number, result))
+    results_q.put(None)
+
+
+def _drain(results_q, workers: int) -> tuple:
+    received = copied = done = 0
+    while done < workers:
+        item = results_q.get()
+        if item is None:
+            done += 1
+        else:
+            received += 1
+            copied += item[1]["copied_bytes"]
+    return received, copied
+
+
+def _summary(received: int, elapsed: float, stalls, copied: int, frame_bytes: int) -> dict:
+    return {"frames": received, "seconds": elapsed, "stalls": stalls,
+            "copies_per_frame": copied / (received * frame_bytes) if received else 0.0,
+            "frame_bytes": frame_bytes}
+
+
+def bench_shared_memory(ctx, frames: int, workers: int, slots: int, stage) -> dict:
+    ring = SharedFrameRing.create(SHAPE, slots, ctx)
+    results_q, stats_q = ctx.Queue(), ctx.Queue()
+    procs = [ctx.Process(target=_worker_main, args=(ring.spec(), stage, results_q)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    start = time.perf_counter()
+    producer = ctx.Process(target=_shm_producer, args=(ring.spec(), frames, workers, stats_q))
+    producer.start()
+    received, copied = _drain(results_q, workers)
+    elapsed = time.perf_counter() - start
+    stats = stats_q.get()
+    for p in [producer, *procs]:
+        p.join()
+    ring.close()
+    return _summary(received, elapsed, stats["stalls"], copied + stats["copied_bytes"], int(np.prod(SHAPE)))
+
+
+def bench_pickle(ctx, source: tuple, workers: int, stage, frame_bytes: int) -> dict:
+    pipes = [ctx.Pipe(duplex=False) for _ in range(workers)]
+    results_q, stats_q = ctx.Queue(), ctx.Queue()
+    procs = [ctx.Process(target=_pickle_worker, args=(recv, stage, results_q)) for recv, _ in pipes]
+    for p in procs:
+        p.start()
+    start = time.perf_counter()
+    producer = ctx.Process(target=_pickle_producer, args=([send for _, send in pipes], source, stats_q))
+    producer.start()
+    received, copied = _drain(results_q, workers)
+    elapsed = time.perf_counter() - start
+    stats = stats_q.get()
+    for p in [producer, *procs]:
+        p.join()
+    return _summary(received, elapsed, stats["stalls"], copied + stats["copied_bytes"], frame_bytes)
+
+
+def bench_pipeline(video_path: Path, workers: int, slots: int, stage, frame_bytes: int) -> dict:
+    """The production path: decoder process reading into slots via cap.read(view)"""
+    start = time.perf_counter()
+    results, stats = run_frame_pipeline(video_path, stage, workers, slots=slots)
+    elapsed = time.perf_counter() - start
+    copied = sum(result["copied_bytes"] for _, result in results)
+    copied += stats["copies"] * frame_bytes
+    return _summary(len(results), elapsed, stats["stalls"], copied, frame_bytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--slots", type=int, default=8)
+    parser.add_argument("--stage", choices=sorted(STAGES), default="light")
+    parser.add_argument("--video", type=Path, help="video for the decode runs; a synthetic clip is written if omitted")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    stage = functools.partial(counting_stage, STAGES[args.stage])
+    synthetic_bytes = int(np.prod(SHAPE))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = args.video or write_test_video(Path(tmp) / "bench.avi", args.frames)
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            parser.error(f"could not open video: {video_path}")
+        width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+        video_bytes = width * height * 3
+
+        runs = (
+            ("shared_memory", "synthetic", synthetic_bytes,
+             lambda: bench_shared_memory(ctx, args.frames, args.workers, args.slots, stage)),
+            ("pickle_pipe", "synthetic", synthetic_bytes,
+             lambda: bench_pickle(ctx, ("synthetic", args.frames), args.workers, stage, synthetic_bytes)),
+            ("shared_memory", "video", video_bytes,
+             lambda: bench_pipeline(video_path, args.workers, args.slots, stage, video_bytes)),
+            ("pickle_pipe", "video", video_bytes,
+             lambda: bench_pickle(ctx, ("video", str(video_path)), args.workers, stage, video_bytes)),
+        )
+
+        print(f"{args.workers} workers, {args.slots} slots, stage={args.stage}; "
+              f"synthetic {args.frames} frames of {SHAPE[1]}x{SHAPE[0]}, video {video_path.name} {width}x{height}")
+        print(f"{'transport':<15}{'source':<11}{'frames':>8}{'fps':>10}{'MB/s':>10}"
+              f"{'copies/frame':>14}{'producer stalls':>17}")
+        for name, source, frame_bytes, bench in runs:
+            r = bench()
+            fps = r["frames"] / r["seconds"]
+            stalls = "-" if r["stalls"] is None else str(r["stalls"])
+            print(f"{name:<15}{source:<11}{r['frames']:>8}{fps:>10.1f}{fps * frame_bytes / 1024 ** 2:>10.0f}"
+                  f"{r['copies_per_frame']:>14.2f}{stalls:>17}")
+    print("video runs include decoding; shared_memory/video goes through run_frame_pipeline")
+
+
+if __name__ == "__main__":
+    main()
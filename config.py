@@ -17,10 +17,21 @@ class Config:
     # 文件存储配置
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
     MAX_FILE_SIZE: str = os.getenv("MAX_FILE_SIZE", "100MB")
+    UPLOAD_SESSION_TTL_HOURS: float = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+    # 设置后视频由反向代理通过X-Accel-Redirect以sendfile方式发送
+    SENDFILE_ACCEL_PREFIX: str = os.getenv("SENDFILE_ACCEL_PREFIX", "")
+    
+    # 存储生命周期配置
+    STORAGE_QUOTA: str = os.getenv("STORAGE_QUOTA", "10GB")
+    RETENTION_SUCCEEDED_HOURS: float = float(os.getenv("RETENTION_SUCCEEDED_HOURS", "168"))
+    RETENTION_FAILED_HOURS: float = float(os.getenv("RETENTION_FAILED_HOURS", "24"))
+    STORAGE_GC_INTERVAL: float = float(os.getenv("STORAGE_GC_INTERVAL", "300"))
     
     # 模型配置
     MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", "4"))
     DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "dummy")
+    # 大于1时使用共享内存帧传输，在独立进程中解码与分析
+    ANALYSIS_PROCESSES: int = int(os.getenv("ANALYSIS_PROCESSES", "0"))
     
     # 日志配置
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
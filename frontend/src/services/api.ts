@@ -13,6 +13,18 @@ export interface UploadResponse {
   job_id: string
 }
 
+export interface ChunkedUploadStatus {
+  upload_id: string
+  filename: string
+  model_name: string
+  total_size: number
+  chunk_size: number
+  total_chunks: number
+  received_chunks: number[]
+  bytes_received: number
+  complete: boolean
+}
+
 export interface StatusResponse {
   job_id: string
   status: string
@@ -25,8 +37,31 @@ export interface ResultResponse {
   result?: any
   message?: string
   completed_at?: string
+  profile?: any
+  video_stored?: boolean
+  thumbnails_stored?: boolean
+}
+
+// Files above this size are sent with the resumable chunked protocol
+const CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024
+const CHUNK_SIZE = 8 * 1024 * 1024
+const PARALLEL_CHUNKS = 4
+const CHUNK_RETRIES = 3
+const UPLOAD_SESSION_PREFIX = 'chunked-upload:'
+
+const sha256Hex = async (buffer: ArrayBuffer): Promise<string | undefined> => {
+  // crypto.subtle is only available in secure contexts
+  if (!globalThis.crypto?.subtle) return undefined
+  const digest = await crypto.subtle.digest('SHA-256', buffer)
+  return Array.from(new Uint8Array(digest))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('')
 }
 
+// Identifies the same local file across retries and page reloads
+const uploadSessionKey = (file: File, modelName: string): string =>
+  `${UPLOAD_SESSION_PREFIX}${modelName}:${file.name}:${file.size}:${file.lastModified}`
+
 class ApiService {
   private baseUrl = '/api'
 
@@ -39,6 +74,11 @@ class ApiService {
   }
 
   async uploadVideo(file: File, modelName: string): Promise<UploadResponse> {
+    // Chunked uploads must send the file's SHA-256, which needs crypto.subtle
+    if (file.size > CHUNKED_UPLOAD_THRESHOLD && globalThis.crypto?.subtle) {
+      return await this.uploadVideoChunked(file, modelName)
+    }
+
     const formData = new FormData()
     formData.append('file', file)
     formData.append('model_name', modelName)
@@ -56,6 +96,112 @@ class ApiService {
     return await response.json()
   }
 
+  async uploadVideoChunked(
+    file: File,
+    modelName: string,
+    uploadId?: string
+  ): Promise<UploadResponse> {
+    // Whole-file digest for the server to verify the assembled upload, hashed while chunks are sent
+    const fileChecksum = file.arrayBuffer().then(sha256Hex)
+
+    // Resume the session a failed attempt left behind, skipping chunks it already received
+    const sessionKey = uploadSessionKey(file, modelName)
+    uploadId = uploadId ?? localStorage.getItem(sessionKey) ?? undefined
+    let session: ChunkedUploadStatus | undefined
+    if (uploadId) {
+      try {
+        session = await this.getChunkedUploadStatus(uploadId)
+      } catch {
+        // Expired or discarded on the server, start over
+        localStorage.removeItem(sessionKey)
+      }
+    }
+    if (!session) {
+      session = await this.initiateChunkedUpload(file, modelName)
+      localStorage.setItem(sessionKey, session.upload_id)
+    }
+    const activeSession = session
+
+    const received = new Set(session.received_chunks)
+    const pending: number[] = []
+    for (let i = 0; i < session.total_chunks; i++) {
+      if (!received.has(i)) pending.push(i)
+    }
+
+    const worker = async () => {
+      let index: number | undefined
+      while ((index = pending.shift()) !== undefined) {
+        await this.uploadChunk(file, activeSession, index)
+      }
+    }
+    await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker))
+
+    const response = await fetch(`${this.baseUrl}/video/uploads/${session.upload_id}/complete`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ sha256: await fileChecksum })
+    })
+    if (!response.ok) {
+      // A session that fails verification cannot be resumed into a valid file
+      localStorage.removeItem(sessionKey)
+      await fetch(`${this.baseUrl}/video/uploads/${session.upload_id}`, { method: 'DELETE' })
+        .catch(() => undefined)
+      const errorData = await response.json()
+      throw new Error(errorData.detail || 'Upload failed')
+    }
+    localStorage.removeItem(sessionKey)
+    return await response.json()
+  }
+
+  private async initiateChunkedUpload(file: File, modelName: string): Promise<ChunkedUploadStatus> {
+    const response = await fetch(`${this.baseUrl}/video/uploads`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        filename: file.name,
+        model_name: modelName,
+        total_size: file.size,
+        chunk_size: CHUNK_SIZE
+      })
+    })
+    if (!response.ok) {
+      const errorData = await response.json()
+      throw new Error(errorData.detail || 'Upload failed')
+    }
+    return await response.json()
+  }
+
+  async getChunkedUploadStatus(uploadId: string): Promise<ChunkedUploadStatus> {
+    const response = await fetch(`${this.baseUrl}/video/uploads/${uploadId}`)
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    return await response.json()
+  }
+
+  private async uploadChunk(file: File, session: ChunkedUploadStatus, index: number) {
+    const start = index * session.chunk_size
+    const buffer = await file.slice(start, start + session.chunk_size).arrayBuffer()
+    const checksum = await sha256Hex(buffer)
+    const headers: Record<string, string> = { 'Content-Type': 'application/octet-stream' }
+    if (checksum) headers['X-Chunk-SHA256'] = checksum
+
+    let lastError: unknown
+    for (let attempt = 0; attempt < CHUNK_RETRIES; attempt++) {
+      try {
+        const response = await fetch(
+          `${this.baseUrl}/video/uploads/${session.upload_id}/chunks/${index}`,
+          { method: 'PUT', headers, body: buffer }
+        )
+        if (response.ok) return
+        lastError = new Error(`HTTP error! status: ${response.status}`)
+      } catch (err) {
+        lastError = err
+      }
+    }
+    throw lastError
+  }
+
   async getJobStatus(jobId: string): Promise<StatusResponse> {
     const response = await fetch(`${this.baseUrl}/video/${jobId}/status`)
     if (!response.ok) {